@@ -1,14 +1,18 @@
 #!/usr/bin/env python3
 # encoding:utf-8
 
+import collections
 import json
 import requests
 import os
 import time
-import random
 import re
+import secrets
 import datetime
 import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import plugins
 from bridge.context import ContextType
 from bridge.reply import Reply, ReplyType
@@ -16,6 +20,11 @@ from common.log import logger
 from common.tmp_dir import TmpDir
 from plugins import *
 
+# 插件命令的前缀，用于快速跳过无关消息
+_COMMAND_PREFIXES = ("整点报时", "报时", "开启自动", "关闭自动", "添加报时", "删除报时")
+# "报时 [小时]"命令
+_HOUR_CMD_RE = re.compile(r'^报时\s+(\d+)$')
+
 @plugins.register(
     name="HourlyVoice",
     desire_priority=10,
@@ -28,10 +37,31 @@ class HourlyVoice(Plugin):
         super().__init__()
         self.handlers[Event.ON_HANDLE_CONTEXT] = self.on_handle_context
         self.config_file = os.path.join(os.path.dirname(__file__), "hourlyvoice_config.json")
+        self._last_saved_payload = None  # 最近一次写入文件的配置内容，用于跳过无变化的保存
+        self.config_lock = threading.Lock()  # 串行化配置保存，避免并发写入同一临时文件
         self.config = self.load_config()
-        self.temp_files = []  # 用于跟踪临时文件
+        # 报时频道集合，用于快速判断频道是否已添加，同时去除配置中的重复频道
+        auto_report = self.config.setdefault("auto_report", {})
+        auto_report["channels"] = list(dict.fromkeys(auto_report.get("channels", [])))
+        self._channels_set = set(auto_report["channels"])
+        self.temp_files = collections.deque(maxlen=48)  # 用于跟踪临时文件，超出上限时删除最早的文件
+        self.cache_dir = os.path.join(os.path.dirname(__file__), "voice_cache")
+        self.voice_cache = {}  # 小时 -> (语音文件路径, 报时文本, 过期时间戳)，按LRU顺序排列
+        self.max_cache_entries = 24
+        self.cache_lock = threading.Lock()
         self.auto_report_thread = None
-        self.stop_thread = False
+        self._stop_event = threading.Event()
+        self.session = self.create_session()
+        self._send_pool = ThreadPoolExecutor(max_workers=8)  # 用于并发向各频道发送报时
+        
+        # 自动报时管理命令 -> 处理函数（返回回复文本）
+        self.commands = {
+            "开启自动报时": self._cmd_enable_auto,
+            "关闭自动报时": self._cmd_disable_auto,
+            "添加报时频道": self._cmd_add_channel,
+            "删除报时频道": self._cmd_remove_channel,
+            "报时频道列表": self._cmd_list_channels,
+        }
         
         # 启动自动报时线程（如果已启用）
         if self.config.get("auto_report", {}).get("enabled", False):
@@ -48,6 +78,7 @@ class HourlyVoice(Plugin):
             if os.path.exists(self.config_file):
                 with open(self.config_file, "r", encoding="utf-8") as f:
                     config = json.load(f)
+                    self._last_saved_payload = json.dumps(config, indent=4, ensure_ascii=False)
                     logger.info(f"[HourlyVoice] 成功加载配置文件")
                     return config
             else:
@@ -59,11 +90,14 @@ class HourlyVoice(Plugin):
                     "auto_report": {
                         "enabled": False,
                         "channels": []
+                    },
+                    "cache": {
+                        "ttl": 86400
                     }
                 }
-                with open(self.config_file, "w", encoding="utf-8") as f:
-                    json.dump(default_config, f, indent=4)
-                logger.info(f"[HourlyVoice] 已创建默认配置文件")
+                self.config = default_config
+                if self.save_config():
+                    logger.info(f"[HourlyVoice] 已创建默认配置文件")
                 return default_config
         except Exception as e:
             logger.error(f"[HourlyVoice] 加载配置文件失败: {e}")
@@ -74,16 +108,41 @@ class HourlyVoice(Plugin):
                 "auto_report": {
                     "enabled": False,
                     "channels": []
+                },
+                "cache": {
+                    "ttl": 86400
                 }
             }
     
+    def create_session(self):
+        """
+        创建复用连接的HTTP会话，重试与退避由urllib3处理
+        :return: requests.Session
+        """
+        session = requests.Session()
+        retry = Retry(total=3, backoff_factor=1, status_forcelist=(500, 502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
     def save_config(self):
         """
-        保存配置到文件
+        保存配置到文件，配置未变化时跳过写入
         """
         try:
-            with open(self.config_file, "w", encoding="utf-8") as f:
-                json.dump(self.config, f, indent=4)
+            with self.config_lock:
+                payload = json.dumps(self.config, indent=4, ensure_ascii=False)
+                if payload == self._last_saved_payload:
+                    logger.debug(f"[HourlyVoice] 配置未变化，跳过保存")
+                    return True
+                
+                # 先写入临时文件再替换，避免写入中断导致配置文件损坏
+                tmp_file = self.config_file + ".tmp"
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    f.write(payload)
+                os.replace(tmp_file, self.config_file)
+                self._last_saved_payload = payload
             logger.info(f"[HourlyVoice] 配置已保存")
             return True
         except Exception as e:
@@ -98,7 +157,7 @@ class HourlyVoice(Plugin):
             logger.info("[HourlyVoice] 自动报时线程已在运行中")
             return
         
-        self.stop_thread = False
+        self._stop_event.clear()
         self.auto_report_thread = threading.Thread(target=self.auto_report_task, daemon=True)
         self.auto_report_thread.start()
         logger.info("[HourlyVoice] 自动报时线程已启动")
@@ -111,7 +170,7 @@ class HourlyVoice(Plugin):
             logger.info("[HourlyVoice] 自动报时线程未在运行")
             return
         
-        self.stop_thread = True
+        self._stop_event.set()
         try:
             self.auto_report_thread.join(timeout=5)
             if self.auto_report_thread.is_alive():
@@ -127,58 +186,37 @@ class HourlyVoice(Plugin):
         """
         logger.info("[HourlyVoice] 自动报时任务已启动")
         
-        # 获取下一个整点时间
-        now = datetime.datetime.now()
-        next_hour = (now.replace(minute=0, second=0, microsecond=0) + 
-                     datetime.timedelta(hours=1))
-        
-        while not self.stop_thread:
+        next_ts = 0
+        while not self._stop_event.is_set():
             try:
-                # 计算距离下一个整点的等待时间
-                now = datetime.datetime.now()
-                wait_seconds = (next_hour - now).total_seconds()
+                # 计算下一个本地整点的时间戳（按本地时区偏移对齐，兼容非整小时时区），
+                # 且不早于上次报时后的整点，避免同一整点重复报时
+                offset = time.localtime().tm_gmtoff
+                next_local_ts = ((int(time.time()) + offset) // 3600 + 1) * 3600 - offset
+                next_ts = max(next_local_ts, next_ts + 3600)
+                
+                # 等待到下一个整点，收到停止信号时立即退出
+                if self._stop_event.wait(timeout=max(0, next_ts - time.time())):
+                    break
                 
-                # 如果等待时间小于0，重新计算下一个整点
-                if wait_seconds <= 0:
-                    next_hour = next_hour + datetime.timedelta(hours=1)
-                    wait_seconds = (next_hour - now).total_seconds()
+                # 到达整点，执行报时（0点对应API的24点）
+                current_hour = datetime.datetime.fromtimestamp(next_ts).hour or 24
+                logger.info(f"[HourlyVoice] 执行整点报时: {current_hour}点")
                 
-                # 等待到下一个整点（每10秒检查一次以便能够及时响应停止信号）
-                wait_count = int(wait_seconds / 10) + 1
-                for _ in range(wait_count):
-                    if self.stop_thread:
-                        return
-                    time.sleep(min(10, wait_seconds))
-                    wait_seconds -= 10
-                    if wait_seconds <= 0:
-                        break
+                # 获取整点报时语音和文本
+                voice_path, text_msg = self.get_hour_voice(current_hour)
                 
-                # 到达整点，执行报时
-                if not self.stop_thread:
-                    current_hour = next_hour.hour
-                    logger.info(f"[HourlyVoice] 执行整点报时: {current_hour}点")
-                    
-                    # 获取整点报时语音和文本
-                    voice_path, text_msg = self.get_hour_voice(current_hour)
-                    
-                    # 发送到配置的所有频道
-                    channels = self.config.get("auto_report", {}).get("channels", [])
-                    if channels:
-                        self.send_to_channels(channels, voice_path, text_msg)
-                    else:
-                        logger.warning("[HourlyVoice] 未配置报时频道，无法发送自动报时")
-                    
-                    # 更新下一个整点时间
-                    next_hour = next_hour + datetime.timedelta(hours=1)
+                # 发送到配置的所有频道
+                channels = self.config.get("auto_report", {}).get("channels", [])
+                if channels:
+                    self.send_to_channels(channels, voice_path, text_msg)
+                else:
+                    logger.warning("[HourlyVoice] 未配置报时频道，无法发送自动报时")
             except Exception as e:
                 logger.error(f"[HourlyVoice] 自动报时任务出错: {e}")
                 # 出错后休眠一段时间，避免频繁错误消耗资源
-                time.sleep(60)
-                
-                # 重新计算下一个整点
-                now = datetime.datetime.now()
-                next_hour = (now.replace(minute=0, second=0, microsecond=0) + 
-                            datetime.timedelta(hours=1))
+                if self._stop_event.wait(timeout=60):
+                    break
         
         logger.info("[HourlyVoice] 自动报时任务已结束")
     
@@ -192,18 +230,31 @@ class HourlyVoice(Plugin):
         if not voice_path:
             logger.warning(f"[HourlyVoice] 语音文件获取失败，仅发送文本消息")
         
-        for channel_id in channels:
-            try:
-                # 先发送文本
-                self.send_text_to_channel(channel_id, text_msg)
+        # 并发发送到各频道，避免排在后面的频道报时延迟
+        futures = [self._send_pool.submit(self._send_one, channel_id, voice_path, text_msg)
+                   for channel_id in list(channels)]
+        _, not_done = wait(futures, timeout=30)
+        if not_done:
+            logger.warning(f"[HourlyVoice] 有 {len(not_done)} 个频道的报时在30秒内未发送完成")
+    
+    def _send_one(self, channel_id, voice_path, text_msg):
+        """
+        向单个频道发送报时消息
+        :param channel_id: 频道ID
+        :param voice_path: 语音文件路径
+        :param text_msg: 文本消息
+        """
+        try:
+            # 先发送文本
+            self.send_text_to_channel(channel_id, text_msg)
+            
+            # 如果有语音，再发送语音
+            if voice_path:
+                self.send_voice_to_channel(channel_id, voice_path)
                 
-                # 如果有语音，再发送语音
-                if voice_path:
-                    self.send_voice_to_channel(channel_id, voice_path)
-                    
-                logger.info(f"[HourlyVoice] 已向频道 {channel_id} 发送整点报时")
-            except Exception as e:
-                logger.error(f"[HourlyVoice] 向频道 {channel_id} 发送报时失败: {e}")
+            logger.info(f"[HourlyVoice] 已向频道 {channel_id} 发送整点报时")
+        except Exception as e:
+            logger.error(f"[HourlyVoice] 向频道 {channel_id} 发送报时失败: {e}")
     
     def send_text_to_channel(self, channel_id, text):
         """
@@ -223,6 +274,60 @@ class HourlyVoice(Plugin):
         except Exception as e:
             logger.error(f"[HourlyVoice] 发送语音到频道 {channel_id} 失败: {e}")
 
+    def get_cache_path(self, hour):
+        """
+        获取指定小时的缓存语音文件路径
+        :param hour: 小时数
+        :return: 缓存文件路径，缓存目录不可用时返回None
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            return os.path.join(self.cache_dir, f"hour_{hour}.mp3")
+        except OSError as e:
+            logger.warning(f"[HourlyVoice] 缓存目录不可用，改用临时文件: {e}")
+            return None
+    
+    def get_cached_voice(self, hour):
+        """
+        从缓存中获取指定小时的报时
+        :param hour: 小时数
+        :return: (语音文件路径, 报时文本消息)，未命中或已过期时返回None
+        """
+        with self.cache_lock:
+            entry = self.voice_cache.get(hour)
+            if not entry:
+                return None
+            
+            voice_path, text_msg, expires_at = entry
+            if time.time() >= expires_at or not os.path.exists(voice_path):
+                self.voice_cache.pop(hour, None)
+                return None
+            
+            # 重新放到末尾，保持LRU顺序
+            self.voice_cache[hour] = self.voice_cache.pop(hour)
+            return voice_path, text_msg
+    
+    def put_cached_voice(self, hour, voice_path, text_msg):
+        """
+        将指定小时的报时写入缓存，超出容量时淘汰最久未使用的条目
+        :param hour: 小时数
+        :param voice_path: 语音文件路径
+        :param text_msg: 报时文本消息
+        """
+        ttl = self.config.get("cache", {}).get("ttl", 86400)
+        with self.cache_lock:
+            self.voice_cache.pop(hour, None)
+            self.voice_cache[hour] = (voice_path, text_msg, time.time() + ttl)
+            
+            while len(self.voice_cache) > self.max_cache_entries:
+                oldest_hour = next(iter(self.voice_cache))
+                oldest_path, _, _ = self.voice_cache.pop(oldest_hour)
+                try:
+                    if os.path.exists(oldest_path):
+                        os.remove(oldest_path)
+                except Exception as e:
+                    logger.error(f"[HourlyVoice] 清理过期缓存文件失败 {oldest_path}: {e}")
+
     def get_hour_voice(self, hour=None):
         """
         从API获取整点报时语音文件
@@ -232,35 +337,40 @@ class HourlyVoice(Plugin):
         try:
             api_url = self.config["api"]["url"]
             
-            # 如果没有指定小时，则获取当前小时
+            # 如果没有指定小时，则获取当前小时（0点对应API的24点）
             if hour is None:
-                current_hour = datetime.datetime.now().hour
-                hour = current_hour
+                hour = datetime.datetime.now().hour or 24
             
-            # 验证小时范围是否有效 (1-24)
-            try:
-                hour_int = int(hour)
-                if hour_int < 1 or hour_int > 24:
-                    return None, f"小时必须在1到24之间，您输入的是{hour_int}"
-                hour = hour_int
-            except ValueError:
+            # 在任何网络请求前校验小时格式与范围 (1-24)，校验后hour始终为int
+            if isinstance(hour, str):
+                if not hour.isdecimal():
+                    return None, f"无效的小时格式: {hour}"
+                # 去掉前导0后超过两位的数字必然超出范围，提前拒绝，避免int()超出位数限制
+                if len(hour.lstrip("0")) > 2:
+                    return None, f"小时必须在1到24之间，您输入的是{hour}"
+                hour = int(hour)
+            elif isinstance(hour, bool) or not isinstance(hour, int):
                 return None, f"无效的小时格式: {hour}"
             
+            if not 1 <= hour <= 24:
+                return None, f"小时必须在1到24之间，您输入的是{hour}"
+            
+            # 命中缓存则直接返回，无需请求API
+            cached = self.get_cached_voice(hour)
+            if cached:
+                logger.info(f"[HourlyVoice] 使用缓存的报时语音: {cached[0]}")
+                return cached
+            
             # 构建API请求URL
             request_url = f"{api_url}?h={hour}"
             
-            for retry in range(3):
-                try:
-                    # 发送请求获取数据
-                    response = requests.get(request_url, timeout=30)
-                    response.raise_for_status()
-                    break
-                except requests.RequestException as e:
-                    if retry == 2:
-                        logger.error(f"[HourlyVoice] 报时API请求失败，重试次数已用完: {e}")
-                        return None, "抱歉，报时服务暂时不可用，请稍后再试"
-                    logger.warning(f"[HourlyVoice] 报时API请求重试 {retry + 1}/3: {e}")
-                    time.sleep(1)
+            try:
+                # 发送请求获取数据
+                response = self.session.get(request_url, timeout=30)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                logger.error(f"[HourlyVoice] 报时API请求失败，重试次数已用完: {e}")
+                return None, "抱歉，报时服务暂时不可用，请稍后再试"
             
             try:
                 data = response.json()
@@ -278,36 +388,55 @@ class HourlyVoice(Plugin):
                     logger.error(f"[HourlyVoice] API返回数据中没有MP3 URL: {data}")
                     return None, f"整点报时 ({time_str})：{text_msg}\n\n[语音获取失败]"
                 
-                # 下载MP3文件
+                # 确定MP3保存路径（优先保存到缓存目录，按小时复用）
+                cache_path = self.get_cache_path(hour)
+                if cache_path:
+                    # 每次下载使用独立的临时文件，避免并发下载同一小时时互相覆盖
+                    mp3_path = f"{cache_path}.{secrets.token_hex(4)}.tmp"
+                else:
+                    tmp_dir = TmpDir().path()
+                    timestamp = int(time.time())
+                    random_str = secrets.token_hex(3)
+                    mp3_path = os.path.join(tmp_dir, f"hourly_voice_{hour}_{timestamp}_{random_str}.mp3")
+                
+                # 流式下载MP3文件，直接写入磁盘
                 try:
-                    mp3_response = requests.get(mp3_url, timeout=30)
-                    mp3_response.raise_for_status()
+                    with self.session.get(mp3_url, stream=True, timeout=30) as mp3_response:
+                        mp3_response.raise_for_status()
+                        with open(mp3_path, "wb") as f:
+                            for chunk in mp3_response.iter_content(chunk_size=65536):
+                                f.write(chunk)
                 except requests.RequestException as e:
                     logger.error(f"[HourlyVoice] 下载MP3失败: {e}")
+                    if os.path.exists(mp3_path):
+                        os.remove(mp3_path)
                     return None, f"整点报时 ({time_str})：{text_msg}\n\n[语音获取失败]"
                 
-                # 保存MP3文件
-                tmp_dir = TmpDir().path()
-                timestamp = int(time.time())
-                random_str = ''.join(random.choices('abcdefghijklmnopqrstuvwxyz', k=6))
-                mp3_path = os.path.join(tmp_dir, f"hourly_voice_{hour}_{timestamp}_{random_str}.mp3")
-                
-                with open(mp3_path, "wb") as f:
-                    f.write(mp3_response.content)
-                
                 if os.path.getsize(mp3_path) == 0:
                     logger.error("[HourlyVoice] 下载的语音文件大小为0")
                     os.remove(mp3_path)
                     return None, f"整点报时 ({time_str})：{text_msg}\n\n[语音获取失败]"
                 
-                # 将临时文件添加到跟踪列表
-                self.temp_files.append(mp3_path)
-                
                 logger.info(f"[HourlyVoice] 语音下载完成: {mp3_path}, 大小: {os.path.getsize(mp3_path)/1024:.2f}KB")
                 
                 # 构建完整的报时消息
                 full_msg = f"整点报时 ({time_str})：\n{text_msg}"
                 
+                if cache_path:
+                    # 下载完成后再替换缓存文件，避免读到不完整的文件
+                    os.replace(mp3_path, cache_path)
+                    mp3_path = cache_path
+                    self.put_cached_voice(hour, mp3_path, full_msg)
+                else:
+                    # 将临时文件添加到跟踪列表，列表已满时删除被挤出的最早文件
+                    evicted = self.temp_files[0] if len(self.temp_files) == self.temp_files.maxlen else None
+                    self.temp_files.append(mp3_path)
+                    if evicted and os.path.exists(evicted):
+                        try:
+                            os.remove(evicted)
+                        except Exception as e:
+                            logger.error(f"[HourlyVoice] 清理临时文件失败 {evicted}: {e}")
+                
                 return mp3_path, full_msg
             else:
                 error_msg = data.get("msg", "未知错误")
@@ -332,6 +461,8 @@ class HourlyVoice(Plugin):
             return
 
         content = e_context["context"].content.strip()
+        if not content.startswith(_COMMAND_PREFIXES):
+            return
         
         # 匹配"整点报时"关键词
         if content == "整点报时":
@@ -345,7 +476,7 @@ class HourlyVoice(Plugin):
             return
         
         # 匹配"报时 [小时]"格式
-        hour_match = re.match(r'^报时\s+(\d+)$', content)
+        hour_match = _HOUR_CMD_RE.match(content)
         if hour_match:
             hour = hour_match.group(1)
             logger.info(f"[HourlyVoice] 收到指定时间报时请求: {hour}点")
@@ -358,116 +489,91 @@ class HourlyVoice(Plugin):
             return
         
         # 自动报时管理命令
-        if content == "开启自动报时":
-            # 开启自动报时
-            self.config["auto_report"]["enabled"] = True
-            self.save_config()
-            self.start_auto_report_thread()
-            
-            reply = Reply()
-            reply.type = ReplyType.TEXT
-            reply.content = "✅ 自动整点报时已开启"
-            e_context["reply"] = reply
-            e_context.action = EventAction.BREAK_PASS
+        handler = self.commands.get(content)
+        if handler:
+            self._reply_text(e_context, handler(e_context))
             return
+
+    def _cmd_enable_auto(self, e_context):
+        """
+        开启自动报时
+        """
+        self.config["auto_report"]["enabled"] = True
+        self.save_config()
+        self.start_auto_report_thread()
+        return "✅ 自动整点报时已开启"
+
+    def _cmd_disable_auto(self, e_context):
+        """
+        关闭自动报时
+        """
+        self.config["auto_report"]["enabled"] = False
+        self.save_config()
+        self.stop_auto_report_thread()
+        return "❌ 自动整点报时已关闭"
+
+    def _cmd_add_channel(self, e_context):
+        """
+        将当前会话添加到报时频道列表
+        """
+        session_id = e_context["context"].get("session_id")
+        if not session_id:
+            return "❌ 无法获取当前会话ID"
         
-        elif content == "关闭自动报时":
-            # 关闭自动报时
-            self.config["auto_report"]["enabled"] = False
-            self.save_config()
-            self.stop_auto_report_thread()
-            
-            reply = Reply()
-            reply.type = ReplyType.TEXT
-            reply.content = "❌ 自动整点报时已关闭"
-            e_context["reply"] = reply
-            e_context.action = EventAction.BREAK_PASS
-            return
+        if session_id in self._channels_set:
+            return "❌ 当前频道已在报时列表中"
         
-        elif content == "添加报时频道":
-            # 获取当前会话的频道ID
-            session_id = e_context["context"].get("session_id")
-            if not session_id:
-                reply = Reply()
-                reply.type = ReplyType.TEXT
-                reply.content = "❌ 无法获取当前会话ID"
-                e_context["reply"] = reply
-                e_context.action = EventAction.BREAK_PASS
-                return
-            
-            # 添加频道到列表
-            channels = self.config.get("auto_report", {}).get("channels", [])
-            if session_id in channels:
-                reply = Reply()
-                reply.type = ReplyType.TEXT
-                reply.content = "❌ 当前频道已在报时列表中"
-                e_context["reply"] = reply
-                e_context.action = EventAction.BREAK_PASS
-                return
-            
-            channels.append(session_id)
-            self.config["auto_report"]["channels"] = channels
-            self.save_config()
-            
-            reply = Reply()
-            reply.type = ReplyType.TEXT
-            reply.content = f"✅ 已将当前频道添加到报时列表\n当前报时频道数: {len(channels)}"
-            e_context["reply"] = reply
-            e_context.action = EventAction.BREAK_PASS
-            return
+        self._channels_set.add(session_id)
+        channels = self.config["auto_report"]["channels"]
+        channels.append(session_id)
+        self.save_config()
+        return f"✅ 已将当前频道添加到报时列表\n当前报时频道数: {len(channels)}"
+
+    def _cmd_remove_channel(self, e_context):
+        """
+        将当前会话从报时频道列表中移除
+        """
+        session_id = e_context["context"].get("session_id")
+        if not session_id:
+            return "❌ 无法获取当前会话ID"
         
-        elif content == "删除报时频道":
-            # 获取当前会话的频道ID
-            session_id = e_context["context"].get("session_id")
-            if not session_id:
-                reply = Reply()
-                reply.type = ReplyType.TEXT
-                reply.content = "❌ 无法获取当前会话ID"
-                e_context["reply"] = reply
-                e_context.action = EventAction.BREAK_PASS
-                return
-            
-            # 从列表中删除频道
-            channels = self.config.get("auto_report", {}).get("channels", [])
-            if session_id not in channels:
-                reply = Reply()
-                reply.type = ReplyType.TEXT
-                reply.content = "❌ 当前频道不在报时列表中"
-                e_context["reply"] = reply
-                e_context.action = EventAction.BREAK_PASS
-                return
-            
-            channels.remove(session_id)
-            self.config["auto_report"]["channels"] = channels
-            self.save_config()
-            
-            reply = Reply()
-            reply.type = ReplyType.TEXT
-            reply.content = f"✅ 已将当前频道从报时列表中移除\n当前报时频道数: {len(channels)}"
-            e_context["reply"] = reply
-            e_context.action = EventAction.BREAK_PASS
-            return
+        if session_id not in self._channels_set:
+            return "❌ 当前频道不在报时列表中"
         
-        elif content == "报时频道列表":
-            # 显示当前所有报时频道
-            channels = self.config.get("auto_report", {}).get("channels", [])
-            enabled = self.config.get("auto_report", {}).get("enabled", False)
-            
-            status = "✅ 已开启" if enabled else "❌ 已关闭"
-            
-            if not channels:
-                reply_text = f"📢 自动整点报时状态: {status}\n\n未配置任何报时频道，请使用「添加报时频道」命令添加"
-            else:
-                reply_text = f"📢 自动整点报时状态: {status}\n\n已配置 {len(channels)} 个报时频道:\n"
-                for i, channel in enumerate(channels, 1):
-                    reply_text += f"{i}. {channel}\n"
-            
-            reply = Reply()
-            reply.type = ReplyType.TEXT
-            reply.content = reply_text
-            e_context["reply"] = reply
-            e_context.action = EventAction.BREAK_PASS
-            return
+        self._channels_set.discard(session_id)
+        channels = self.config["auto_report"]["channels"]
+        channels.remove(session_id)
+        self.save_config()
+        return f"✅ 已将当前频道从报时列表中移除\n当前报时频道数: {len(channels)}"
+
+    def _cmd_list_channels(self, e_context):
+        """
+        显示当前所有报时频道
+        """
+        channels = self.config.get("auto_report", {}).get("channels", [])
+        enabled = self.config.get("auto_report", {}).get("enabled", False)
+        
+        status = "✅ 已开启" if enabled else "❌ 已关闭"
+        
+        if not channels:
+            return f"📢 自动整点报时状态: {status}\n\n未配置任何报时频道，请使用「添加报时频道」命令添加"
+        
+        reply_text = f"📢 自动整点报时状态: {status}\n\n已配置 {len(channels)} 个报时频道:\n"
+        for i, channel in enumerate(channels, 1):
+            reply_text += f"{i}. {channel}\n"
+        return reply_text
+
+    def _reply_text(self, e_context, text):
+        """
+        回复文本消息并阻止请求传递给其他插件
+        :param e_context: 事件上下文
+        :param text: 回复文本
+        """
+        reply = Reply()
+        reply.type = ReplyType.TEXT
+        reply.content = text
+        e_context["reply"] = reply
+        e_context.action = EventAction.BREAK_PASS
 
     def _handle_voice_result(self, e_context, voice_path, text_msg):
         """
@@ -489,11 +595,7 @@ class HourlyVoice(Plugin):
             e_context.action = EventAction.BREAK_PASS
         else:
             # 仅发送文本回复
-            text_reply = Reply()
-            text_reply.type = ReplyType.TEXT
-            text_reply.content = text_msg
-            e_context["reply"] = text_reply
-            e_context.action = EventAction.BREAK_PASS
+            self._reply_text(e_context, text_msg)
 
     def get_help_text(self, **kwargs):
         """
@@ -525,6 +627,15 @@ class HourlyVoice(Plugin):
         # 停止自动报时线程
         self.stop_auto_report_thread()
         
+        # 关闭发送线程池
+        self._send_pool.shutdown(wait=False)
+        
+        # 关闭HTTP会话
+        try:
+            self.session.close()
+        except Exception as e:
+            logger.error(f"[HourlyVoice] 关闭HTTP会话失败: {e}")
+        
         # 清理临时文件
         try:
             for file_path in self.temp_files: